@@ -5,15 +5,30 @@ from dotenv import load_dotenv
 load_dotenv()
 
 MONGO_URL = os.getenv("MONGO_URL")
-DB_NAME = "ecommerce"
+DB_NAME = os.getenv("DB_NAME", "ecommerce")
+
+# Total number of Mongo connections the whole deployment may open. Every
+# worker process gets an equal share of it (see worker_pool_size).
+MONGO_CONNECTION_BUDGET = int(os.getenv("MONGO_CONNECTION_BUDGET", "100"))
 
 client = None
 db = None
 
+def worker_pool_size() -> int:
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    return max(1, MONGO_CONNECTION_BUDGET // workers)
+
 async def connect_to_mongo():
     global client, db
-    client = AsyncIOMotorClient(MONGO_URL)
+    client = AsyncIOMotorClient(MONGO_URL, maxPoolSize=worker_pool_size())
     db = client[DB_NAME]
 
+async def close_mongo_connection():
+    global client, db
+    if client is not None:
+        client.close()
+    client = None
+    db = None
+
 def get_db():
     return db
@@ -1,8 +1,11 @@
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
-from app.db.database import connect_to_mongo
+from app.db.database import connect_to_mongo, close_mongo_connection
 from app.routers import auth, admin,order,customer
 from app.utils.error_handler import validation_exception_handler
+from app.utils.audit import start_auditor, stop_auditor
+from app.utils.inventory import start_reaper, stop_reaper
+from app.utils.pubsub import start_listener, stop_listener
 from fastapi.middleware.cors import CORSMiddleware
 app = FastAPI(title="E-Commerce API")
 
@@ -16,6 +19,16 @@ app = FastAPI(
 @app.on_event("startup")
 async def startup_db_client():
     await connect_to_mongo()
+    await start_listener()
+    await start_reaper()
+    await start_auditor()
+
+@app.on_event("shutdown")
+async def shutdown_db_client():
+    await stop_auditor()
+    await stop_reaper()
+    await stop_listener()
+    await close_mongo_connection()
 
 @app.get("/")
 async def root():
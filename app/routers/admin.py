@@ -4,10 +4,16 @@ from fastapi import APIRouter, HTTPException, Depends,Query
 from app.db.database import get_db
 from app.schemas.order import OrderOut, OrderStatusUpdate
 from app.schemas.user import CreateUser, UserOut
-from app.utils.auth import hash_password
+from app.utils import audit
+from app.utils.auth import KEYS_CHANNEL, hash_password
 from app.utils.depends import require_admin
 from bson import ObjectId
-from app.schemas.product import ProductCreate, ProductUpdate, ProductOut
+from pymongo import ReturnDocument
+from app.schemas.product import AdminProductOut, ProductCreate, ProductUpdate, ProductOut
+from app.schemas.audit import AuditPage
+from app.schemas.inventory import InventoryOut, StockShardsUpdate
+from app.utils.inventory import enable_sharding, fill_stock, set_stock, stock_levels
+from app.utils.pubsub import publish
 from fastapi.responses import JSONResponse
 
 router = APIRouter()
@@ -32,10 +38,9 @@ async def create_customer(
     user_dict["role"] = "customer"
 
     result = await db.users.insert_one(user_dict)
-    print("Inserted user ID:", result.inserted_id)  
 
     created_user = await db.users.find_one({"_id": result.inserted_id})
-    print("Retrieved user:", created_user)  
+    audit.record(admin, "create", "users", result.inserted_id, after=created_user)
 
     return {
         "id": str(created_user["_id"]),
@@ -73,10 +78,11 @@ async def create_product(
     product_dict['image_url'] = str(product_dict['image_url'])
     result = await db.products.insert_one(product_dict)
     created_product = await db.products.find_one({"_id": result.inserted_id})
+    audit.record(admin, "create", "products", result.inserted_id, after=created_product)
     created_product["id"] = str(created_product["_id"])
     return created_product
 
-@router.put("/update/products/{product_id}", response_model=ProductOut)
+@router.put("/update/products/{product_id}", response_model=AdminProductOut)
 async def update_product(
     product_id: str,
     update: ProductUpdate,
@@ -95,11 +101,22 @@ async def update_product(
     if 'image_url' in update_data:
         update_data['image_url'] = str(update_data['image_url'])
 
-    await db.products.update_one(
-        {"_id": ObjectId(product_id)},
-        {"$set": update_data}
-    )
+    # Audit the total stock, not the raw field, which is 0 for sharded products.
+    before = (await fill_stock(db, [dict(existing)]))[0]
+
+    # The admin sets the total, held units included, and it may be spread
+    # over shard counters, so it is not a plain $set.
+    if update_data.get("stock") is not None:
+        await set_stock(db, existing, update_data.pop("stock"))
+
+    if update_data:
+        await db.products.update_one(
+            {"_id": ObjectId(product_id)},
+            {"$set": update_data}
+        )
     updated = await db.products.find_one({"_id": ObjectId(product_id)})
+    await fill_stock(db, [updated])
+    audit.record(admin, "update", "products", product_id, before=before, after=updated)
     return {**updated, "id": str(updated["_id"])}
 
 ALLOWED_STATUSES = {"pending", "confirmed", "shipped", "delivered"}
@@ -112,14 +129,21 @@ async def soft_delete_product(
     if not ObjectId.is_valid(product_id):
         raise HTTPException(status_code=400, detail="Invalid product ID")
 
-    result = await db.products.update_one(
+    previous = await db.products.find_one_and_update(
         {"_id": ObjectId(product_id)},
-        {"$set": {"is_deleted": True}}
+        {"$set": {"is_deleted": True}},
+        projection={"is_deleted": 1},
+        return_document=ReturnDocument.BEFORE,
     )
 
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Product not found")
 
+    audit.record(
+        admin, "delete", "products", product_id,
+        before={"is_deleted": previous.get("is_deleted", False)}, after={"is_deleted": True}
+    )
+
     return {"detail": "Product soft-deleted successfully"}
 
 
@@ -131,8 +155,8 @@ async def get_all_products(
     admin=Depends(require_admin)
 ):
     filter_query = {"$or": [{"is_deleted": False}, {"is_deleted": {"$exists": False}}]}
-    cursor = db.products.find(filter_query).skip(skip).limit(limit)
-    products = await cursor.to_list(length=limit)
+    cursor = db.products.find(filter_query, {"held_by": 0}).skip(skip).limit(limit)
+    products = await fill_stock(db, await cursor.to_list(length=limit))
 
     total_count = await db.products.count_documents(filter_query)
     total_pages = (total_count + limit - 1) // limit
@@ -233,5 +257,98 @@ async def update_order_status(
         {"_id": ObjectId(order_id)},
         {"$set": {"status": new_status}}
     )
+    audit.record(
+        admin, "update_status", "orders", order_id,
+        before={"status": order.get("status")}, after={"status": new_status}
+    )
+
+    return {"message": f"Order status updated to '{new_status}'"}
+
+
+@router.post("/auth/reload-keys")
+async def reload_jwt_keys(admin=Depends(require_admin)):
+    # Every worker re-reads SECRET_KEY, JWT_KEYS and JWT_ACTIVE_KID, e.g.
+    # after a leaked key was removed from .env.
+    await publish(KEYS_CHANNEL)
+    audit.record(admin, "reload_keys", "config", "jwt_keys")
+    return {"message": "JWT keys are being reloaded by all workers"}
+
+
+@router.get("/inventory/{product_id}", response_model=InventoryOut)
+async def get_inventory(
+    product_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    admin=Depends(require_admin),
+):
+    if not ObjectId.is_valid(product_id):
+        raise HTTPException(status_code=400, detail="Invalid product ID")
+
+    levels = await stock_levels(db, [ObjectId(product_id)])
+    level = levels.get(ObjectId(product_id))
+    if not level:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    active_holds = await db.stock_holds.count_documents(
+        {"product_id": ObjectId(product_id), "status": {"$in": ["pending", "held"]}}
+    )
+    return {"product_id": product_id, "active_holds": active_holds, **level}
+
 
-    return {"message": f"Order status updated to '{new_status}'"}
\ No newline at end of file
+@router.post("/inventory/{product_id}/shards", response_model=InventoryOut)
+async def shard_product_stock(
+    product_id: str,
+    shard_update: StockShardsUpdate,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    admin=Depends(require_admin),
+):
+    if not ObjectId.is_valid(product_id):
+        raise HTTPException(status_code=400, detail="Invalid product ID")
+
+    product = await enable_sharding(db, ObjectId(product_id), shard_update.shards)
+    if not product:
+        existing = await db.products.find_one({"_id": ObjectId(product_id)}, {"_id": 1})
+        if not existing:
+            raise HTTPException(status_code=404, detail="Product not found")
+        raise HTTPException(status_code=400, detail="Product stock is already sharded")
+
+    return await get_inventory(product_id, db, admin)
+
+
+@router.get("/audit", response_model=AuditPage)
+async def get_audit_log(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=200),
+    action: str = Query(None),
+    collection: str = Query(None),
+    target_id: str = Query(None),
+    actor_id: str = Query(None),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    admin=Depends(require_admin),
+):
+    # Include events this worker has buffered but not yet written.
+    await audit.flush()
+
+    filter_query = {
+        key: value
+        for key, value in {
+            "action": action,
+            "collection": collection,
+            "target_id": target_id,
+            "actor_id": actor_id,
+        }.items()
+        if value is not None
+    }
+    cursor = db[audit.AUDIT_COLLECTION].find(filter_query).sort("created_at", -1).skip(skip).limit(limit)
+    events = await cursor.to_list(length=limit)
+    total_count = await db[audit.AUDIT_COLLECTION].count_documents(filter_query)
+
+    return {
+        "events": [{**event, "id": str(event["_id"])} for event in events],
+        "pagination": {
+            "total_items": total_count,
+            "total_pages": (total_count + limit - 1) // limit,
+            "current_page": (skip // limit) + 1,
+            "page_size": limit,
+            "skip": skip
+        }
+    }
\ No newline at end of file
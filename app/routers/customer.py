@@ -2,13 +2,14 @@ from fastapi import APIRouter, HTTPException
 from bson import ObjectId
 from app.db.database import get_db
 from app.schemas.product import ProductOut
+from app.utils.inventory import fill_stock
 
 router = APIRouter()
 
 @router.get("/list/products", response_model=list[ProductOut])
 async def list_products():
     db = get_db()
-    products = await db.products.find().to_list(length=None)
+    products = await fill_stock(db, await db.products.find({}, {"held_by": 0}).to_list(length=None))
     return [{**p, "id": str(p["_id"])} for p in products]
 
 @router.get("/read by id/products/{product_id}", response_model=ProductOut)
@@ -21,4 +22,5 @@ async def get_product(product_id: str):
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
+    await fill_stock(db, [product])
     return {**product, "id": str(product["_id"])}
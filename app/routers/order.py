@@ -6,6 +6,7 @@ from app.utils.depends import require_customer
 from app.db.database import get_db
 from datetime import datetime, timezone
 from app.utils.email import send_order_email_to_admin
+from app.utils.inventory import cancel_committed_hold, commit_hold, release_hold, reserve_stock
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter()
@@ -19,6 +20,7 @@ async def place_order(
 ):
     total = 0
     validated_items = []
+    products = []
 
     for item in order.items:
         if not ObjectId.is_valid(item.product_id):
@@ -28,37 +30,52 @@ async def place_order(
         if not product:
             raise HTTPException(status_code=404, detail=f"Product not found: {item.product_id}")
         
-        stock = product.get("stock")
-
-        if stock is None:
-            raise HTTPException(status_code=500, detail=f"'in_stock' field is missing in product {item.product_id}")
-
-        try:
-            stock = int(stock)
-        except (ValueError, TypeError):
-            raise HTTPException(status_code=500, detail=f"'in_stock' is not a valid number in product {item.product_id}")
-
-        if stock < item.quantity:
-            raise HTTPException(status_code=400, detail=f"Not enough stock for {product.get('name', 'Unknown Product')}")
-
         total += product["price"] * item.quantity
         validated_items.append(item)
+        products.append(product)
+
+    # Stock is taken with conditional updates rather than checked up front,
+    # so concurrent buyers can never oversell. If anything fails before the
+    # holds are committed they are released here or expire on their own.
+    holds = []
+    for item, product in zip(validated_items, products):
+        hold_id = await reserve_stock(db, product["_id"], item.quantity, product.get("stock_shards", 0))
+        if hold_id is None:
+            for held in holds:
+                await release_hold(db, held)
+            raise HTTPException(status_code=400, detail=f"Not enough stock for {product.get('name', 'Unknown Product')}")
+        holds.append(hold_id)
 
     order_data = {
         "user_id": (customer["_id"]),
         "items": [item.dict() for item in validated_items],
         "total_price": total,
         "status": "pending",
-        "created_at": datetime.now(timezone.utc)
+        "created_at": datetime.now(timezone.utc),
+        # Lets the reaper commit these holds if this worker dies before it does.
+        "hold_ids": holds,
     }
 
-    result = await db.orders.insert_one(order_data)
-
-    for item in validated_items:
-        await db.products.update_one(
-            {"_id": ObjectId(item.product_id)},
-            {"$inc": {"in_stock": -item.quantity}}
-        )
+    try:
+        result = await db.orders.insert_one(order_data)
+    except Exception:
+        for hold_id in holds:
+            await release_hold(db, hold_id)
+        raise
+
+    # A hold that expired before this point has already gone back on sale,
+    # so the order cannot be fulfilled from it.
+    committed = []
+    for hold_id in holds:
+        if not await commit_hold(db, hold_id, result.inserted_id):
+            # The order goes first so the reaper cannot commit what is left.
+            await db.orders.delete_one({"_id": result.inserted_id})
+            for held in committed:
+                await cancel_committed_hold(db, held)
+            for held in holds[len(committed) + 1:]:
+                await release_hold(db, held)
+            raise HTTPException(status_code=409, detail="Stock reservation expired, please place the order again")
+        committed.append(hold_id)
 
     background_tasks.add_task(
         send_order_email_to_admin,
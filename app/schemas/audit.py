@@ -0,0 +1,24 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+
+class AuditEventOut(BaseModel):
+    id: str
+    actor_id: str
+    actor_email: Optional[str]
+    action: str
+    collection: str
+    target_id: str
+    changes: Dict[str, Any]
+    created_at: datetime
+
+class AuditPagination(BaseModel):
+    total_items: int
+    total_pages: int
+    current_page: int
+    page_size: int
+    skip: int
+
+class AuditPage(BaseModel):
+    events: List[AuditEventOut]
+    pagination: AuditPagination
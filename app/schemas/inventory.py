@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class StockShardOut(BaseModel):
+    shard: int
+    stock: int
+    reserved: int
+
+class InventoryOut(BaseModel):
+    product_id: str
+    available: int
+    reserved: int
+    active_holds: int
+    shards: List[StockShardOut] = []
+
+class StockShardsUpdate(BaseModel):
+    shards: int = Field(..., ge=2, le=64)
@@ -1,6 +1,6 @@
 from datetime import datetime
 import enum
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 class OrderStatus(str, enum.Enum):
@@ -11,7 +11,7 @@ class OrderStatus(str, enum.Enum):
 
 class OrderItem(BaseModel):
     product_id: str
-    quantity: int
+    quantity: int = Field(..., gt=0)
     status: Optional[OrderStatus] = OrderStatus.PENDING
 
 class OrderCreate(BaseModel):
@@ -20,3 +20,7 @@ class ProductUpdate(BaseModel):
 
 class ProductOut(ProductBase):
     id: str
+
+class AdminProductOut(ProductOut):
+    # Units held for orders in progress; `stock` is the total minus these.
+    reserved: int = 0
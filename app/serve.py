@@ -0,0 +1,85 @@
+"""Production launcher: `python -m app.serve`.
+
+Runs the API under gunicorn with N uvicorn workers. The app is imported once
+in the master (preload) and forked; each worker opens its own Mongo client on
+startup with a share of MONGO_CONNECTION_BUDGET.
+
+Deploying new code without downtime needs PIDFILE set, so the master
+writes its pid there (e.g. PIDFILE=/run/ecommerce-api.pid); without it no
+pidfile is written and several instances can run side by side:
+
+    kill -USR2 $(cat $PIDFILE)          # new master + workers load the new code;
+                                        # the old pid moves to $PIDFILE.oldbin
+    kill -WINCH $(cat $PIDFILE.oldbin)  # old workers finish in-flight requests
+                                        # (within GRACEFUL_TIMEOUT) and exit
+    kill -QUIT $(cat $PIDFILE.oldbin)   # once the new workers are healthy
+
+To roll back instead, `kill -HUP` the old master to respawn its workers and
+`kill -QUIT` the new one.
+
+`kill -HUP` alone only replaces the workers. Because the app is preloaded
+they are forked from the code already imported in the master, so HUP does
+not pick up a deploy.
+"""
+import multiprocessing
+import os
+import sys
+from dotenv import load_dotenv
+from gunicorn.app.base import BaseApplication
+
+load_dotenv()
+
+
+def _reexec_as_module(server):
+    # USR2 re-runs sys.argv, which for `python -m app.serve` is the path of
+    # this file; run as a plain script it could not import the app package.
+    server.START_CTX["args"] = [sys.executable, "-m", "app.serve", *sys.argv[1:]]
+
+
+def default_workers() -> int:
+    return int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+
+class StandaloneApplication(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import app
+        return app
+
+
+def run(workers: int = None, bind: str = None):
+    workers = workers or default_workers()
+    # Workers read this to size their connection pool, so it must be set
+    # before the app is preloaded and forked.
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+
+    options = {
+        "bind": bind or os.getenv("BIND", "0.0.0.0:8000"),
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "graceful_timeout": int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+        "timeout": int(os.getenv("WORKER_TIMEOUT", "60")),
+        "keepalive": 5,
+        "pidfile": os.getenv("PIDFILE"),
+        "pre_exec": _reexec_as_module,
+    }
+    StandaloneApplication(options).run()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the E-commerce API with multiple workers")
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("-b", "--bind", default=None)
+    args = parser.parse_args()
+    run(workers=args.workers, bind=args.bind)
@@ -0,0 +1,111 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from bson import ObjectId
+from app.db.database import get_db
+
+# Admin mutations are recorded write-behind: record() only appends to an
+# in-memory buffer, which is written with one insert_many every
+# AUDIT_BATCH_SIZE events or AUDIT_FLUSH_INTERVAL_MS, whichever comes first,
+# and once more on shutdown. Events older than AUDIT_RETENTION_DAYS are
+# removed by a TTL index.
+
+AUDIT_COLLECTION = "audit_log"
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "true").lower() != "false"
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+AUDIT_FLUSH_INTERVAL_MS = int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "500"))
+AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "90"))
+# If Mongo is unreachable, failed batches are kept for a retry up to this many.
+AUDIT_MAX_BUFFER = 10_000
+
+REDACTED_FIELDS = {"password"}
+# Maintained by the stock ledger, not by admins; changes come from orders.
+IGNORED_FIELDS = {"_id", "reserved", "held_by", "stock_shards"}
+
+_buffer = []
+_flusher = None
+_pending_flushes = set()
+
+
+def _clean(value):
+    return str(value) if isinstance(value, ObjectId) else value
+
+
+def diff(before: dict = None, after: dict = None) -> dict:
+    """Field-level changes between two versions of a document."""
+    before, after = before or {}, after or {}
+    changes = {}
+    for field in sorted(before.keys() | after.keys()):
+        if field in IGNORED_FIELDS or before.get(field) == after.get(field):
+            continue
+        if field in REDACTED_FIELDS:
+            changes[field] = {"before": "***", "after": "***"}
+            continue
+        changes[field] = {"before": _clean(before.get(field)), "after": _clean(after.get(field))}
+    return changes
+
+
+def record(admin: dict, action: str, collection: str, target_id, before: dict = None, after: dict = None):
+    if not AUDIT_ENABLED:
+        return
+    _buffer.append({
+        "actor_id": str(admin["_id"]),
+        "actor_email": admin.get("email"),
+        "action": action,
+        "collection": collection,
+        "target_id": str(target_id),
+        "changes": diff(before, after),
+        "created_at": datetime.now(timezone.utc),
+    })
+    if len(_buffer) >= AUDIT_BATCH_SIZE:
+        task = asyncio.get_running_loop().create_task(flush())
+        _pending_flushes.add(task)
+        task.add_done_callback(_pending_flushes.discard)
+
+
+async def flush():
+    global _buffer
+    if not _buffer:
+        return
+    events, _buffer = _buffer, []
+    try:
+        await get_db()[AUDIT_COLLECTION].insert_many(events, ordered=False)
+    except Exception as e:
+        print(f"[Audit Error] Failed to write {len(events)} events: {e}")
+        room = AUDIT_MAX_BUFFER - len(_buffer)
+        if room > 0:
+            _buffer = events[-room:] + _buffer
+
+
+async def ensure_indexes(db):
+    await db[AUDIT_COLLECTION].create_index(
+        "created_at", expireAfterSeconds=AUDIT_RETENTION_DAYS * 24 * 60 * 60
+    )
+    await db[AUDIT_COLLECTION].create_index([("target_id", 1), ("created_at", -1)])
+
+
+async def _flush_periodically():
+    while True:
+        await asyncio.sleep(AUDIT_FLUSH_INTERVAL_MS / 1000)
+        await flush()
+
+
+async def start_auditor():
+    global _flusher
+    await ensure_indexes(get_db())
+    if _flusher is None:
+        _flusher = asyncio.create_task(_flush_periodically())
+
+
+async def stop_auditor():
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        try:
+            await _flusher
+        except asyncio.CancelledError:
+            pass
+    _flusher = None
+    if _pending_flushes:
+        await asyncio.gather(*_pending_flushes)
+    await flush()
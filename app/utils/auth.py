@@ -1,12 +1,30 @@
 from passlib.context import CryptContext
-from jose import jwt, JWTError
+import base64
+import hashlib
+import hmac
+import json
 import os
+import time
 from datetime import datetime, timedelta,timezone
+from dotenv import load_dotenv
+from app.utils.pubsub import subscribe
+
+load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+# Signing keys by kid. JWT_KEYS="2025-06:secret-a,2025-01:secret-b" adds
+# keys for rotation and JWT_ACTIVE_KID picks the one new tokens are signed
+# with; older keys keep verifying until they are removed and the keys are
+# reloaded (reload_keys). SECRET_KEY is always available as kid "default",
+# which also verifies tokens issued before kids were introduced.
+DEFAULT_KID = "default"
+TOKEN_CACHE_SIZE = 10_000
+# Publishing on this channel makes every worker re-read its keys.
+KEYS_CHANNEL = "auth.keys"
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(password: str) -> str:
@@ -15,14 +33,133 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+def _load_keys() -> dict:
+    keys = {}
+    secret_key = os.getenv("SECRET_KEY")
+    if secret_key:
+        keys[DEFAULT_KID] = secret_key
+    for entry in filter(None, os.getenv("JWT_KEYS", "").split(",")):
+        kid, _, secret = entry.strip().partition(":")
+        if kid and secret:
+            keys[kid] = secret
+    return keys
+
+
+class TokenService:
+    """HS256 JWTs signed with the stdlib, with kid-based key rotation and a
+    cache of already verified tokens kept until they expire."""
+
+    def __init__(self, keys: dict, active_kid: str, cache_size: int = TOKEN_CACHE_SIZE):
+        if active_kid not in keys:
+            raise RuntimeError(f"Active JWT key '{active_kid}' is not configured")
+        self.active_kid = active_kid
+        self.cache_size = cache_size
+        # HMAC objects are keyed once here and copied for every token.
+        self._macs = {kid: hmac.new(secret.encode(), digestmod=hashlib.sha256) for kid, secret in keys.items()}
+        # Encoded header -> kid, so known headers are matched without JSON parsing.
+        self._headers = {
+            _b64encode(json.dumps({"alg": ALGORITHM, "typ": "JWT", "kid": kid}, separators=(",", ":")).encode()): kid
+            for kid in keys
+        }
+        self._active_header = next(h for h, kid in self._headers.items() if kid == active_kid)
+        self._cache = {}
+
+    def _sign(self, kid: str, signing_input: bytes) -> str:
+        mac = self._macs[kid].copy()
+        mac.update(signing_input)
+        return _b64encode(mac.digest())
+
+    def _kid_for(self, header_segment: str):
+        kid = self._headers.get(header_segment)
+        if kid is not None:
+            return kid
+        header = json.loads(_b64decode(header_segment))
+        if header.get("alg") != ALGORITHM:
+            return None
+        return header.get("kid", DEFAULT_KID)
+
+    def encode(self, claims: dict) -> str:
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        signing_input = f"{self._active_header}.{payload}"
+        return f"{signing_input}.{self._sign(self.active_kid, signing_input.encode())}"
+
+    def decode(self, token: str):
+        """Return the claims of a valid, unexpired token, otherwise None."""
+        now = time.time()
+        cached = self._cache.get(token)
+        if cached is not None:
+            if cached[0] > now:
+                # A copy, so callers cannot change what later requests see.
+                return dict(cached[1])
+            del self._cache[token]
+            return None
+
+        try:
+            signing_input, _, signature = token.rpartition(".")
+            header_segment, _, payload_segment = signing_input.partition(".")
+            kid = self._kid_for(header_segment)
+            if kid not in self._macs:
+                return None
+            if not hmac.compare_digest(signature, self._sign(kid, signing_input.encode())):
+                return None
+            claims = json.loads(_b64decode(payload_segment))
+        except (ValueError, TypeError, AttributeError):
+            return None
+
+        exp = claims.get("exp") if isinstance(claims, dict) else None
+        if not isinstance(exp, (int, float)) or exp <= now:
+            return None
+
+        if len(self._cache) >= self.cache_size:
+            self._evict(now)
+        self._cache[token] = (exp, claims)
+        return dict(claims)
+
+    def _evict(self, now: float):
+        for token in [t for t, (exp, _) in self._cache.items() if exp <= now]:
+            del self._cache[token]
+        # Still full of live tokens: drop the oldest half.
+        if len(self._cache) >= self.cache_size:
+            for token in list(self._cache)[: self.cache_size // 2]:
+                del self._cache[token]
+
+    def clear_cache(self):
+        self._cache.clear()
+
+
+def _build_service() -> TokenService:
+    keys = _load_keys()
+    if not keys:
+        raise RuntimeError("SECRET_KEY is not set in the environment")
+    return TokenService(keys, os.getenv("JWT_ACTIVE_KID", DEFAULT_KID if DEFAULT_KID in keys else next(iter(keys))))
+
+
+tokens = _build_service()
+
+
+def reload_keys(payload: dict = None):
+    """Re-read the signing keys, with .env taking precedence, and start over
+    with an empty cache so tokens of removed keys stop verifying at once.
+    A broken configuration raises and leaves the current keys in place."""
+    global tokens
+    load_dotenv(override=True)
+    tokens = _build_service()
+    print(f"[Auth] Reloaded JWT keys, active kid '{tokens.active_kid}'")
+
+
+subscribe(KEYS_CHANNEL, reload_keys)
+
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
-    to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return tokens.encode({**data, "exp": int(expire.timestamp())})
 
 def decode_access_token(token: str):
-    try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
-        return None
+    return tokens.decode(token)
@@ -1,64 +1,63 @@
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from fastapi import HTTPException, Request, status
+from app.constant import UserRole
 from app.db.database import get_db
-from motor.motor_asyncio import AsyncIOMotorDatabase
-import os
-from dotenv import load_dotenv
-load_dotenv()
+from app.utils.auth import decode_access_token
 
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
-
-
-SECRET_KEY = os.getenv("SECRET_KEY")
-if not SECRET_KEY:
-    raise RuntimeError("SECRET_KEY is not set in the environment")
-ALGORITHM = "HS256"
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncIOMotorDatabase = Depends(get_db),
-):
-    #print("Incoming token:", token) 
-
-    credentials_exception = HTTPException(
+def _credentials_error():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email = payload.get("sub")
-        #print("Decoded token payload:", payload)  
-        if email is None:
-            raise credentials_exception
 
-        user = await db.users.find_one({"email": email})
-        #print("Fetched user:", user)  
+def _bearer_token(request: Request):
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token
+
+
+def require_role(*roles: UserRole, detail: str = "Insufficient privileges"):
+    """Build a dependency that authenticates the caller and checks their role.
+
+    Everything is worked out here, once, when the route module is imported;
+    per request FastAPI resolves a single dependency that reads the header,
+    verifies the token (cached until it expires) and loads the user.
+    """
+    allowed = frozenset(role.value if isinstance(role, UserRole) else role for role in roles)
+
+    async def dependency(request: Request):
+        token = _bearer_token(request)
+        if token is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        payload = decode_access_token(token)
+        if payload is None or payload.get("sub") is None:
+            raise _credentials_error()
+
+        # Reject on the signed role before paying for the user lookup.
+        if allowed and payload.get("role") not in allowed:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+        user = await get_db().users.find_one({"email": payload["sub"]})
         if not user:
-            raise credentials_exception
+            raise _credentials_error()
+        if allowed and user.get("role") not in allowed:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
         return user
-    except JWTError as e:
-        #print("JWT Error:", e) 
-        raise credentials_exception
 
-    
+    return dependency
 
-async def require_admin(current_user: dict = Depends(get_current_user)):
-    if current_user.get("role") != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Admin privileges required"
-        )
-    return current_user
 
-async def require_customer(
-    user: dict = Depends(get_current_user)
-):
-    if user.get("role") != "customer":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied: Customers only."
-        )
-    return user
+get_current_user = require_role()
+require_admin = require_role(UserRole.admin, detail="Admin privileges required")
+require_customer = require_role(UserRole.customer, detail="Access denied: Customers only.")
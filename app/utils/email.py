@@ -19,6 +19,9 @@ def send_order_email_to_admin(
     items,
     total_price: float
 ):
+    if not (EMAIL_SENDER and EMAIL_PASSWORD and ADMIN_EMAIL):
+        return  # email is not configured
+
     try:
         # Compose subject and body
         subject = f"New Order from {customer_name}"
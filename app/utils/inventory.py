@@ -0,0 +1,328 @@
+import asyncio
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import ReturnDocument
+from app.db.database import get_db
+
+# Stock lives on the product document (`stock`) and, for hot products that
+# have been split with enable_sharding, in N sub-counters in `stock_shards`.
+# Available stock is always the sum of both, and so is `reserved`, the units
+# held for orders in progress; the stock an admin sets is the two together.
+# Every reservation is a conditional $inc guarded by `stock >= quantity`, so
+# it never oversells, and is recorded as a hold that is either committed to
+# an order or returned to stock when it is released or expires.
+
+HOLD_TTL_SECONDS = int(os.getenv("STOCK_HOLD_TTL_SECONDS", "300"))
+REAPER_INTERVAL_SECONDS = int(os.getenv("STOCK_REAPER_INTERVAL_SECONDS", "30"))
+CLOSED_HOLD_RETENTION_SECONDS = 24 * 60 * 60
+
+_reaper = None
+
+
+async def ensure_indexes(db):
+    await db.stock_shards.create_index([("product_id", 1), ("shard", 1)], unique=True)
+    await db.stock_holds.create_index([("status", 1), ("expires_at", 1)])
+    # Closed holds are only kept around for inspection; Mongo drops them.
+    await db.stock_holds.create_index("closed_at", expireAfterSeconds=CLOSED_HOLD_RETENTION_SECONDS)
+    await db.orders.create_index("hold_ids", sparse=True)
+
+
+def _counter(db, product_id: ObjectId, shard):
+    if shard is None:
+        return db.products, {"_id": product_id}
+    return db.stock_shards, {"product_id": product_id, "shard": shard}
+
+
+async def _take(db, product_id: ObjectId, shard, quantity: int, hold_id: ObjectId) -> bool:
+    collection, query = _counter(db, product_id, shard)
+    # The counter remembers which holds took from it, in the same write.
+    result = await collection.update_one(
+        {**query, "stock": {"$gte": quantity}},
+        {"$inc": {"stock": -quantity, "reserved": quantity}, "$push": {"held_by": hold_id}},
+    )
+    return result.modified_count == 1
+
+
+async def _give_back(db, product_id: ObjectId, shard, quantity: int, restock: bool, hold_id: ObjectId = None):
+    """Return units to a counter. With `hold_id` the hold's reservation there
+    ends too, but only if the hold really took from this counter, which makes
+    it safe to give back every counter a hold may have taken from."""
+    collection, query = _counter(db, product_id, shard)
+    update = {"$inc": {"stock": quantity} if restock else {}}
+    if hold_id is not None:
+        query["held_by"] = hold_id
+        update["$inc"]["reserved"] = -quantity
+        update["$pull"] = {"held_by": hold_id}
+    await collection.update_one(query, update)
+
+
+async def reserve_stock(db, product_id: ObjectId, quantity: int, shards: int = 0):
+    """Hold `quantity` units of a product. Returns the hold id, or None if
+    there is not enough stock.
+
+    `shards` is the product's `stock_shards` value. Sharded products start
+    at a random sub-counter so concurrent buyers spread across documents.
+    """
+    candidates = [None]
+    if shards:
+        start = random.randrange(shards)
+        candidates = [(start + i) % shards for i in range(shards)] + [None]
+
+    # The hold is written before any stock is taken, listing every counter it
+    # may take from, so if this stops halfway the reaper still finds and
+    # returns whatever was taken.
+    now = datetime.now(timezone.utc)
+    result = await db.stock_holds.insert_one({
+        "product_id": product_id,
+        "quantity": quantity,
+        "allocations": [{"shard": shard, "quantity": quantity} for shard in candidates],
+        "status": "pending",
+        "created_at": now,
+        "expires_at": now + timedelta(seconds=HOLD_TTL_SECONDS),
+    })
+    hold_id = result.inserted_id
+
+    allocations = None
+    for shard in candidates:
+        if await _take(db, product_id, shard, quantity, hold_id):
+            allocations = [{"shard": shard, "quantity": quantity}]
+            break
+
+    if allocations is None and shards:
+        # No single counter can cover the order; gather it piece by piece.
+        remaining = quantity
+        plan = []
+        counters = await db.stock_shards.find({"product_id": product_id, "stock": {"$gt": 0}}).to_list(length=None)
+        product = await db.products.find_one({"_id": product_id}, {"stock": 1})
+        pieces = [(c["shard"], c["stock"]) for c in counters] + [(None, (product or {}).get("stock", 0))]
+        for shard, stock in pieces:
+            take = min(stock, remaining)
+            if take > 0:
+                plan.append({"shard": shard, "quantity": take})
+                remaining -= take
+        if not remaining:
+            await db.stock_holds.update_one({"_id": hold_id}, {"$set": {"allocations": plan}})
+            for allocation in plan:
+                if not await _take(db, product_id, allocation["shard"], allocation["quantity"], hold_id):
+                    break
+            else:
+                allocations = plan
+
+    if allocations is not None:
+        result = await db.stock_holds.update_one(
+            {"_id": hold_id, "status": "pending"},
+            {"$set": {"status": "held", "allocations": allocations}},
+        )
+        if result.modified_count:
+            return hold_id
+    # Not enough stock, or the reaper already gave up on this hold.
+    await release_hold(db, hold_id)
+    return None
+
+
+async def _close_hold(db, hold_id: ObjectId, status: str, extra: dict = None, open_statuses=("held",)):
+    return await db.stock_holds.find_one_and_update(
+        {"_id": hold_id, "status": {"$in": list(open_statuses)}},
+        {"$set": {"status": status, "closed_at": datetime.now(timezone.utc), **(extra or {})}},
+        return_document=ReturnDocument.BEFORE,
+    )
+
+
+async def commit_hold(db, hold_id: ObjectId, order_id: ObjectId) -> bool:
+    """Turn a hold into a sale: the stock stays taken, the reservation goes."""
+    hold = await _close_hold(db, hold_id, "committed", {"order_id": order_id})
+    if not hold:
+        # The reaper commits holds of stored orders itself.
+        committed = await db.stock_holds.count_documents(
+            {"_id": hold_id, "status": "committed", "order_id": order_id}
+        )
+        return committed == 1
+    for allocation in hold["allocations"]:
+        await _give_back(
+            db, hold["product_id"], allocation["shard"], allocation["quantity"], restock=False, hold_id=hold_id
+        )
+    return True
+
+
+async def release_hold(db, hold_id: ObjectId, status: str = "released") -> bool:
+    """Return a hold's stock. Safe to call more than once or concurrently."""
+    hold = await _close_hold(db, hold_id, status, open_statuses=("pending", "held"))
+    if not hold:
+        return False
+    for allocation in hold["allocations"]:
+        await _give_back(
+            db, hold["product_id"], allocation["shard"], allocation["quantity"], restock=True, hold_id=hold_id
+        )
+    return True
+
+
+async def cancel_committed_hold(db, hold_id: ObjectId) -> bool:
+    """Put the stock of an already committed hold back on sale, for orders
+    that could not be completed."""
+    hold = await db.stock_holds.find_one_and_update(
+        {"_id": hold_id, "status": "committed"},
+        {"$set": {"status": "cancelled", "closed_at": datetime.now(timezone.utc)}},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if not hold:
+        return False
+    for allocation in hold["allocations"]:
+        await _give_back(db, hold["product_id"], allocation["shard"], allocation["quantity"], restock=True)
+    return True
+
+
+async def release_expired_holds(db, limit: int = 500) -> int:
+    now = datetime.now(timezone.utc)
+    expired = await db.stock_holds.find(
+        {"status": {"$in": ["pending", "held"]}, "expires_at": {"$lt": now}}, {"_id": 1}
+    ).to_list(length=limit)
+    if not expired:
+        return 0
+
+    # Holds of an order that was stored but never committed (the worker died
+    # in between) are sold, not abandoned, so they are committed instead.
+    hold_ids = [hold["_id"] for hold in expired]
+    orders = {}
+    async for order in db.orders.find({"hold_ids": {"$in": hold_ids}}, {"hold_ids": 1}):
+        for hold_id in order["hold_ids"]:
+            orders[hold_id] = order["_id"]
+
+    released = 0
+    for hold_id in hold_ids:
+        if hold_id in orders:
+            await commit_hold(db, hold_id, orders[hold_id])
+        elif await release_hold(db, hold_id, status="expired"):
+            released += 1
+    return released
+
+
+async def enable_sharding(db, product_id: ObjectId, shards: int):
+    """Move a product's stock into `shards` sub-counters.
+
+    Returns the product as it was before, or None if it does not exist or
+    is already sharded.
+    """
+    product = await db.products.find_one_and_update(
+        {"_id": product_id, "stock_shards": {"$exists": False}},
+        {"$set": {"stock": 0, "stock_shards": shards}},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if not product:
+        return None
+
+    stock = int(product.get("stock", 0))
+    await db.stock_shards.insert_many([
+        {
+            "product_id": product_id,
+            "shard": i,
+            "stock": stock // shards + (1 if i < stock % shards else 0),
+            "reserved": 0,
+        }
+        for i in range(shards)
+    ])
+    return product
+
+
+async def _set_total(collection, query: dict, total: int):
+    # Compare-and-set on both fields: a reservation or release that lands
+    # between the read and the write makes the update miss, and it is retried.
+    while True:
+        counter = await collection.find_one(query, {"stock": 1, "reserved": 1})
+        if counter is None:
+            await collection.update_one(query, {"$set": {"stock": total, "reserved": 0}}, upsert=True)
+            return
+        result = await collection.update_one(
+            {"_id": counter["_id"], "stock": counter.get("stock"), "reserved": counter.get("reserved")},
+            {"$set": {"stock": total - counter.get("reserved", 0)}},
+        )
+        if result.matched_count:
+            return
+
+
+async def set_stock(db, product: dict, total: int):
+    """Set a product's total stock, units held for open orders included.
+
+    Each counter keeps its reservations and gets `stock = share - reserved`,
+    so holds that are released later land on the admin's figure instead of
+    on top of it. `stock` goes below zero while more is held than the new
+    total allows; nothing can be reserved from it until it recovers.
+    """
+    shards = product.get("stock_shards", 0)
+    if not shards:
+        await _set_total(db.products, {"_id": product["_id"]}, total)
+        return
+    await _set_total(db.products, {"_id": product["_id"]}, 0)
+    for i in range(shards):
+        await _set_total(
+            db.stock_shards,
+            {"product_id": product["_id"], "shard": i},
+            total // shards + (1 if i < total % shards else 0),
+        )
+
+
+async def stock_levels(db, product_ids: list) -> dict:
+    """Sum available and reserved stock per product, shards included."""
+    levels = {}
+    async for product in db.products.find({"_id": {"$in": product_ids}}, {"stock": 1, "reserved": 1}):
+        levels[product["_id"]] = {
+            "available": int(product.get("stock", 0)),
+            "reserved": int(product.get("reserved", 0)),
+            "shards": [],
+        }
+    async for counter in db.stock_shards.find({"product_id": {"$in": product_ids}}).sort("shard", 1):
+        level = levels.get(counter["product_id"])
+        if level is None:
+            continue
+        level["available"] += counter.get("stock", 0)
+        level["reserved"] += counter.get("reserved", 0)
+        level["shards"].append({
+            "shard": counter["shard"],
+            "stock": counter.get("stock", 0),
+            "reserved": counter.get("reserved", 0),
+        })
+    return levels
+
+
+async def fill_stock(db, products: list) -> list:
+    """Set `stock` and `reserved` on each product to its totals across
+    shards. `stock` is what can be sold right now, so it never shows below
+    zero (see set_stock)."""
+    sharded = [p["_id"] for p in products if p.get("stock_shards")]
+    levels = await stock_levels(db, sharded) if sharded else {}
+    for p in products:
+        level = levels.get(p["_id"])
+        if level:
+            p["stock"], p["reserved"] = level["available"], level["reserved"]
+        p["stock"] = max(int(p.get("stock", 0)), 0)
+    return products
+
+
+async def _reap():
+    while True:
+        await asyncio.sleep(REAPER_INTERVAL_SECONDS)
+        try:
+            released = await release_expired_holds(get_db())
+            if released:
+                print(f"[Inventory] Released {released} expired stock holds")
+        except Exception as e:
+            print(f"[Inventory Error] Reaper failed: {e}")
+
+
+async def start_reaper():
+    global _reaper
+    await ensure_indexes(get_db())
+    if _reaper is None:
+        _reaper = asyncio.create_task(_reap())
+
+
+async def stop_reaper():
+    global _reaper
+    if _reaper is not None:
+        _reaper.cancel()
+        try:
+            await _reaper
+        except asyncio.CancelledError:
+            pass
+    _reaper = None
@@ -0,0 +1,107 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from bson import Timestamp
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+from app.db.database import get_db
+
+# Cross-worker messages go through a capped collection that every worker
+# tails. Capped collections work on a standalone mongod, unlike change
+# streams which need a replica set.
+EVENTS_COLLECTION = "events"
+EVENTS_COLLECTION_SIZE = 1024 * 1024  # bytes
+MAX_RETRY_DELAY_SECONDS = 30
+
+_handlers = {}
+_listener = None
+
+
+def subscribe(channel: str, handler):
+    """Register `handler(payload)` to be called for every message on `channel`.
+
+    The handler may be a plain function or a coroutine function. It runs in
+    every worker, including the one that published the message.
+    """
+    _handlers.setdefault(channel, []).append(handler)
+
+
+async def publish(channel: str, payload: dict = None):
+    db = get_db()
+    await db[EVENTS_COLLECTION].insert_one({
+        # An empty timestamp in a top-level field is filled in by the server
+        # with a value that only ever increases, unlike client-made ObjectIds
+        # which are not ordered across processes or hosts.
+        "ts": Timestamp(0, 0),
+        "channel": channel,
+        "payload": payload or {},
+        "pid": os.getpid(),
+        "created_at": datetime.now(timezone.utc),
+    })
+
+
+async def _ensure_collection(db):
+    try:
+        await db.create_collection(EVENTS_COLLECTION, capped=True, size=EVENTS_COLLECTION_SIZE)
+    except CollectionInvalid:
+        pass  # another worker created it first
+
+
+async def _dispatch(event):
+    for handler in _handlers.get(event.get("channel"), []):
+        try:
+            result = handler(event.get("payload", {}))
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            print(f"[PubSub Error] Handler for '{event.get('channel')}' failed: {e}")
+
+
+async def _listen():
+    last_ts = None
+    started = False
+    delay = 1  # seconds, doubled after each consecutive failure
+
+    while True:
+        try:
+            db = get_db()
+            events = db[EVENTS_COLLECTION]
+            if not started:
+                await _ensure_collection(db)
+                # Only deliver messages published after this worker started.
+                latest = await events.find_one({"ts": {"$exists": True}}, sort=[("$natural", -1)])
+                last_ts = latest["ts"] if latest else None
+                started = True
+
+            query = {"ts": {"$gt": last_ts}} if last_ts is not None else {"ts": {"$exists": True}}
+            cursor = events.find(query, cursor_type=CursorType.TAILABLE_AWAIT)
+            while cursor.alive:
+                async for event in cursor:
+                    last_ts = event["ts"]
+                    await _dispatch(event)
+        except Exception as e:
+            print(f"[PubSub Error] Listener failed, retrying in {delay}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY_SECONDS)
+            continue
+        # The cursor dies straight away on an empty collection; retry shortly.
+        delay = 1
+        await asyncio.sleep(1)
+
+
+async def start_listener():
+    global _listener
+    # Nothing to deliver to, so no need to keep a cursor open.
+    if _listener is None and _handlers:
+        _listener = asyncio.create_task(_listen())
+
+
+async def stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+    _listener = None
@@ -0,0 +1,110 @@
+"""Write-path overhead of the audit log.
+
+    python -m benchmarks.audit --mutations 2000 --concurrency 16
+    python -m benchmarks.audit --target mongo --mongo-url mongodb://localhost:27017
+
+Runs the same stream of admin product updates through the real
+`PUT /admin/update/products/{id}` route with auditing off and then on, and
+reports throughput and latency for both. Afterwards it checks that every
+audited mutation reached the audit collection.
+
+The in-memory target writes each batch synchronously on the event loop,
+so it overstates the cost; use --target mongo for representative numbers.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.runner import percentile, token_for  # sets benchmark env defaults first
+import httpx
+from benchmarks.datagen import generate_products, generate_users, object_id
+
+
+async def _make_database(args):
+    if args.target == "memory":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("--target memory needs mongomock-motor: pip install mongomock-motor")
+        return AsyncMongoMockClient()[args.db]
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+    return AsyncIOMotorClient(args.mongo_url)[args.db]
+
+
+async def _mutate(client, args, headers) -> list:
+    latencies = []
+    queue = iter(range(args.mutations))
+
+    async def worker():
+        for i in queue:
+            product = object_id("product", i % args.products)
+            body = {"name": f"Product {i}", "description": "Updated", "price": 1 + i % 100, "stock": i % 50}
+            started = time.perf_counter()
+            response = await client.put(f"/admin/update/products/{product}", json=body, headers=headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+            response.raise_for_status()
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return latencies
+
+
+async def run(args):
+    from app.db import database
+    from app.main import app
+    from app.utils import audit
+
+    db = await _make_database(args)
+    for name in ("users", "products", audit.AUDIT_COLLECTION):
+        await db[name].drop()
+    await db.users.insert_many(list(generate_users(1, args.seed, "unused")))
+    await db.products.insert_many(list(generate_products(args.products, args.seed)))
+    database.db = db
+
+    headers = {"Authorization": f"Bearer {token_for(0, {})}"}
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+        for label, enabled in (("audit off", False), ("audit on", True)):
+            audit.AUDIT_ENABLED = enabled
+            # Lifespan events do not run under ASGITransport.
+            await audit.start_auditor()
+            started = time.perf_counter()
+            latencies = sorted(await _mutate(client, args, headers))
+            duration = time.perf_counter() - started
+            await audit.stop_auditor()
+            results[label] = (len(latencies) / duration, latencies)
+
+    print(f"{args.mutations} product updates, concurrency {args.concurrency}, target {args.target}")
+    print(f"{'':<10} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for label, (rps, latencies) in results.items():
+        print(f"{label:<10} {rps:>10.1f} {percentile(latencies, 50):>9.3f} "
+              f"{percentile(latencies, 95):>9.3f} {percentile(latencies, 99):>9.3f}")
+
+    off, on = results["audit off"][0], results["audit on"][0]
+    print(f"throughput overhead: {(off - on) / off * 100:+.1f}%")
+
+    written = await db[audit.AUDIT_COLLECTION].count_documents({})
+    print(f"audit events written: {written} of {args.mutations}")
+    return written == args.mutations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mutations", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--target", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="ecommerce_bench")
+    args = parser.parse_args()
+
+    if not asyncio.run(run(args)):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Per-request authentication cost.
+
+    python -m benchmarks.auth --requests 10000
+
+Times token verification for N requests: python-jose (what the app used
+before), the token service with every token new (cold) and with one token
+reused (cached), and finally the full require_admin dependency against an
+in-memory user store.
+
+python-jose is no longer in requirements.txt, so the before/after
+comparison is skipped unless it is installed separately:
+
+    pip install python-jose==3.5.0
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.runner import token_for  # sets benchmark env defaults first
+from benchmarks.datagen import generate_users
+
+
+def _report(label: str, count: int, seconds: float):
+    print(f"{label:<28} {seconds * 1e6 / count:>9.2f} us/request {count / seconds:>12.0f} req/s")
+
+
+def _time(fn, items) -> float:
+    started = time.perf_counter()
+    for item in items:
+        fn(item)
+    return time.perf_counter() - started
+
+
+async def _time_dependency(dependency, request, count: int) -> float:
+    started = time.perf_counter()
+    for _ in range(count):
+        await dependency(request)
+    return time.perf_counter() - started
+
+
+def main():
+    from app.utils.auth import SECRET_KEY, ALGORITHM, create_access_token, tokens
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10_000)
+    args = parser.parse_args()
+    count = args.requests
+
+    claims = {"sub": "admin@example.com", "role": "admin", "id": "0"}
+    distinct = [create_access_token({**claims, "n": i}) for i in range(count)]
+    same = [distinct[0]] * count
+
+    try:
+        from jose import jwt
+    except ImportError:
+        print("python-jose not installed, skipping the old decode path")
+    else:
+        _report("python-jose decode", count, _time(lambda t: jwt.decode(t, SECRET_KEY, algorithms=[ALGORITHM]), distinct))
+
+    tokens.clear_cache()
+    _report("token service, cold", count, _time(tokens.decode, distinct))
+    _report("token service, cached", count, _time(tokens.decode, same))
+
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        print("mongomock-motor not installed, skipping the require_admin dependency")
+        return
+
+    from starlette.requests import Request
+    from app.db import database
+    from app.utils.depends import require_admin
+
+    async def run_dependency():
+        db = AsyncMongoMockClient()["auth_bench"]
+        await db.users.insert_many(list(generate_users(1, 42, "unused")))
+        database.db = db
+        token = token_for(0, {})
+        request = Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+        return await _time_dependency(require_admin, request, count)
+
+    _report("require_admin (with lookup)", count, asyncio.run(run_dependency()))
+
+
+if __name__ == "__main__":
+    main()
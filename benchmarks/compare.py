@@ -0,0 +1,50 @@
+"""Diff two benchmark result files.
+
+    python -m benchmarks.compare old.json new.json
+"""
+import json
+import sys
+
+METRICS = [
+    ("throughput_rps", "throughput_rps", True),
+    ("p50 ms", "latency_ms.p50", False),
+    ("p95 ms", "latency_ms.p95", False),
+    ("p99 ms", "latency_ms.p99", False),
+    ("mongo ops/req", "mongo_ops_per_request", False),
+]
+
+
+def _lookup(result: dict, dotted: str):
+    value = result
+    for key in dotted.split("."):
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def compare(old: dict, new: dict):
+    print(f"{(old.get('commit') or '?')[:10]} -> {(new.get('commit') or '?')[:10]}  "
+          f"({new['workload']} @ {new['scale']}, {new['target']})")
+    print(f"{'metric':<16} {'old':>12} {'new':>12} {'change':>9}")
+    for label, key, higher_is_better in METRICS:
+        before, after = _lookup(old, key), _lookup(new, key)
+        if before is None or after is None:
+            print(f"{label:<16} {str(before):>12} {str(after):>12} {'n/a':>9}")
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        worse = change < 0 if higher_is_better else change > 0
+        flag = " !" if worse and abs(change) >= 5 else ""
+        print(f"{label:<16} {before:>12} {after:>12} {change:>+8.1f}%{flag}")
+
+
+def main():
+    if len(sys.argv) != 3:
+        raise SystemExit(__doc__)
+    with open(sys.argv[1]) as f:
+        old = json.load(f)
+    with open(sys.argv[2]) as f:
+        new = json.load(f)
+    compare(old, new)
+
+
+if __name__ == "__main__":
+    main()
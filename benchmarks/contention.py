@@ -0,0 +1,113 @@
+"""Flash-sale contention: many buyers, one product.
+
+    python -m benchmarks.contention --buyers 1000 --stock 500 --shards 0
+    python -m benchmarks.contention --buyers 1000 --stock 500 --shards 8 --target mongo
+
+Every buyer places one order for one unit, all at once, through the real
+`POST /create/orders` route. Afterwards the stock ledger is checked: exactly
+min(buyers, stock) orders may succeed, and available + sold must equal the
+starting stock with nothing left reserved. Exits non-zero on oversell.
+
+The in-memory target serialises every Mongo call, so only --target mongo
+shows real write contention.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.runner import token_for  # sets benchmark env defaults first
+import httpx
+from benchmarks.datagen import generate_users, object_id, PASSWORD
+
+
+async def _make_database(args):
+    if args.target == "memory":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("--target memory needs mongomock-motor: pip install mongomock-motor")
+        return AsyncMongoMockClient()[args.db]
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+    return AsyncIOMotorClient(args.mongo_url)[args.db]
+
+
+async def run(args) -> bool:
+    from app.db import database
+    from app.main import app
+    from app.utils.auth import hash_password
+    from app.utils.inventory import enable_sharding, ensure_indexes, stock_levels
+
+    db = await _make_database(args)
+    for name in ("users", "products", "orders", "stock_holds", "stock_shards"):
+        await db[name].drop()
+    await ensure_indexes(db)
+
+    await db.users.insert_many(list(generate_users(args.buyers + 1, args.seed, hash_password(PASSWORD))))
+    product_id = object_id("product", 0)
+    await db.products.insert_one({
+        "_id": product_id,
+        "name": "Flash sale item",
+        "description": "Hot SKU",
+        "price": 9.99,
+        "stock": args.stock,
+    })
+    if args.shards:
+        await enable_sharding(db, product_id, args.shards)
+
+    database.db = db
+    tokens = {}
+    body = {"items": [{"product_id": str(product_id), "quantity": 1}]}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=120) as client:
+        async def buy(user):
+            headers = {"Authorization": f"Bearer {token_for(user, tokens)}"}
+            response = await client.post("/create/orders", json=body, headers=headers)
+            return response.status_code
+
+        started = time.perf_counter()
+        codes = await asyncio.gather(*(buy(user) for user in range(1, args.buyers + 1)))
+        duration = time.perf_counter() - started
+
+    sold = codes.count(200)
+    rejected = codes.count(400)
+    level = (await stock_levels(db, [product_id]))[product_id]
+    orders = await db.orders.count_documents({"items.product_id": str(product_id)})
+    negative_shards = [s for s in level["shards"] if s["stock"] < 0]
+
+    expected = min(args.buyers, args.stock)
+    checks = {
+        "sold == min(buyers, stock)": sold == expected,
+        "orders stored == sold": orders == sold,
+        "available + sold == stock": level["available"] + sold == args.stock,
+        "nothing left reserved": level["reserved"] == 0,
+        "no negative counters": level["available"] >= 0 and not negative_shards,
+    }
+
+    print(f"buyers={args.buyers} stock={args.stock} shards={args.shards} target={args.target}")
+    print(f"sold={sold} rejected={rejected} other={len(codes) - sold - rejected} "
+          f"available={level['available']} reserved={level['reserved']}")
+    print(f"{len(codes) / duration:.1f} orders/s attempted, {sold / duration:.1f} orders/s sold, {duration:.2f}s total")
+    for name, ok in checks.items():
+        print(f"  [{'ok' if ok else 'FAIL'}] {name}")
+    return all(checks.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buyers", type=int, default=1000)
+    parser.add_argument("--stock", type=int, default=500)
+    parser.add_argument("--shards", type=int, default=0, help="0 keeps stock on the product document")
+    parser.add_argument("--target", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="ecommerce_bench")
+    args = parser.parse_args()
+
+    if not asyncio.run(run(args)):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
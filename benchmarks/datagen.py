@@ -0,0 +1,149 @@
+"""Deterministic dataset generator for benchmarks.
+
+    python -m benchmarks.datagen --scale 10k --mongo-url mongodb://localhost:27017 --db ecommerce_bench
+
+The same seed and scale always produce the same documents, including the
+ObjectIds, so workloads can address products, users and orders by index
+without querying for them first.
+"""
+import argparse
+import asyncio
+import random
+import struct
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+
+SCALES = {
+    "10k": {"users": 1_000, "products": 1_000, "orders": 10_000},
+    "1M": {"users": 100_000, "products": 50_000, "orders": 1_000_000},
+    "10M": {"users": 1_000_000, "products": 500_000, "orders": 10_000_000},
+}
+
+BATCH_SIZE = 10_000
+PASSWORD = "benchmark-password"
+ADMIN_EMAIL = "admin@example.com"
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+STATUSES = ["pending", "confirmed", "shipped", "delivered"]
+
+_KINDS = {"user": b"usr0", "product": b"prd0", "order": b"ord0"}
+
+
+def object_id(kind: str, index: int) -> ObjectId:
+    return ObjectId(struct.pack(">4sQ", _KINDS[kind], index))
+
+
+def user_email(index: int) -> str:
+    return ADMIN_EMAIL if index == 0 else f"user{index}@example.com"
+
+
+def product_price(seed: int, index: int) -> float:
+    return round(random.Random(f"{seed}:price:{index}").uniform(1, 500), 2)
+
+
+def generate_users(count: int, seed: int, password_hash: str):
+    rng = random.Random(f"{seed}:users")
+    for i in range(count):
+        yield {
+            "_id": object_id("user", i),
+            "email": user_email(i),
+            "username": f"user{i}",
+            "password": password_hash,
+            "phone": f"03{rng.randrange(10**9):09d}",
+            "role": "admin" if i == 0 else "customer",
+        }
+
+
+def generate_products(count: int, seed: int):
+    rng = random.Random(f"{seed}:products")
+    for i in range(count):
+        yield {
+            "_id": object_id("product", i),
+            "name": f"Product {i}",
+            "description": f"Benchmark product number {i}",
+            "price": product_price(seed, i),
+            # Large enough that checkout workloads never run out.
+            "stock": rng.randrange(10**6, 10**7),
+            "image_url": f"https://example.com/images/{i}.png",
+            "is_deleted": rng.random() < 0.05,
+        }
+
+
+def generate_orders(count: int, seed: int, users: int, products: int):
+    rng = random.Random(f"{seed}:orders")
+    for i in range(count):
+        items = []
+        total = 0
+        for _ in range(rng.randint(1, 4)):
+            product = rng.randrange(products)
+            quantity = rng.randint(1, 3)
+            items.append({
+                "product_id": str(object_id("product", product)),
+                "quantity": quantity,
+                "status": "pending",
+            })
+            total += product_price(seed, product) * quantity
+        yield {
+            "_id": object_id("order", i),
+            "user_id": object_id("user", rng.randrange(1, users)),
+            "items": items,
+            "total_price": round(total, 2),
+            "status": rng.choice(STATUSES),
+            "created_at": EPOCH + timedelta(minutes=i),
+        }
+
+
+async def _insert_batches(collection, documents):
+    batch = []
+    for doc in documents:
+        batch.append(doc)
+        if len(batch) >= BATCH_SIZE:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+
+
+async def seed(db, scale: str = "10k", seed: int = 42, drop: bool = True):
+    """Fill `db` with the dataset for `scale`. Returns the counts used."""
+    from app.utils.auth import hash_password
+
+    counts = SCALES[scale]
+    if drop:
+        for name in ("users", "products", "orders", "stock_holds", "stock_shards"):
+            await db[name].drop()
+
+    # bcrypt is far too slow to run per user; everyone shares one hash.
+    password_hash = hash_password(PASSWORD)
+
+    await _insert_batches(db.users, generate_users(counts["users"], seed, password_hash))
+    await _insert_batches(db.products, generate_products(counts["products"], seed))
+    await _insert_batches(
+        db.orders, generate_orders(counts["orders"], seed, counts["users"], counts["products"])
+    )
+    await db.users.create_index("email", unique=True)
+    await db.orders.create_index("user_id")
+    return counts
+
+
+def main():
+    import os
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="ecommerce_bench")
+    args = parser.parse_args()
+
+    async def run():
+        client = AsyncIOMotorClient(args.mongo_url)
+        counts = await seed(client[args.db], args.scale, args.seed)
+        client.close()
+        print(f"Seeded {args.db}: {counts}")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
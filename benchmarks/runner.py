@@ -0,0 +1,261 @@
+"""Benchmark runner.
+
+    # in-process against an in-memory Motor stand-in (mongomock-motor)
+    python -m benchmarks.runner --workload browse-heavy --scale 10k --target memory
+
+    # in-process against a local mongod (seeded into --db first)
+    python -m benchmarks.runner --workload checkout-heavy --target mongo --mongo-url mongodb://localhost:27017
+
+    # over HTTP against a server started with DB_NAME=ecommerce_bench, seeded
+    # beforehand with benchmarks.datagen (same --scale and --seed)
+    python -m benchmarks.runner --workload admin-report --target http --url http://127.0.0.1:8000
+
+Writes a JSON result file (see --output); compare two of them with
+`python -m benchmarks.compare old.json new.json`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+# Settings must be in place before the app modules read them at import time.
+# .env comes first so tokens are signed with the same key as a server started
+# from it; the fallback key only applies when nothing is configured.
+load_dotenv()
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ["EMAIL_SENDER"] = ""  # never send real mail while benchmarking
+
+# A run is rejected when more than this share of responses is not 2xx; some
+# endpoints legitimately 404 (e.g. customers without orders), 401/403 never do.
+MAX_ERROR_RATE = 0.5
+
+import httpx
+from benchmarks.datagen import SCALES, object_id, seed, user_email
+from benchmarks.workloads import WORKLOADS, build_requests
+
+# Collection methods that hit the server. Cursor methods (to_list, next)
+# are not counted separately; the find() that created the cursor is.
+MONGO_OPS = {
+    "find", "find_one", "find_one_and_update", "find_one_and_delete", "find_one_and_replace",
+    "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "count_documents", "estimated_document_count",
+    "aggregate", "distinct", "bulk_write",
+}
+
+_current_ops = ContextVar("current_ops", default=None)
+
+
+class _CountingCollection:
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name not in MONGO_OPS:
+            return attr
+
+        def counted(*args, **kwargs):
+            ops = _current_ops.get()
+            if ops is not None:
+                ops[0] += 1
+            return attr(*args, **kwargs)
+        return counted
+
+
+class CountingDatabase:
+    """Wraps a Motor database and counts collection operations per request."""
+
+    def __init__(self, db):
+        self._db = db
+        self._collection_type = type(db["_"])
+
+    def __getitem__(self, name):
+        return _CountingCollection(self._db[name])
+
+    def __getattr__(self, name):
+        attr = getattr(self._db, name)
+        if isinstance(attr, self._collection_type):
+            return _CountingCollection(attr)
+        return attr
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def token_for(user: int, tokens: dict) -> str:
+    from app.utils.auth import create_access_token
+
+    if user not in tokens:
+        tokens[user] = create_access_token({
+            "sub": user_email(user),
+            "role": "admin" if user == 0 else "customer",
+            "id": str(object_id("user", user)),
+        })
+    return tokens[user]
+
+
+async def _make_database(args):
+    if args.target == "memory":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("--target memory needs mongomock-motor: pip install mongomock-motor")
+        client = AsyncMongoMockClient()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(args.mongo_url)
+
+    db = client[args.db]
+    if not args.no_seed:
+        print(f"Seeding {args.scale} dataset...")
+        await seed(db, args.scale, args.seed)
+    return db
+
+
+async def run(args) -> dict:
+    counts = SCALES[args.scale]
+    requests = build_requests(args.workload, random.Random(args.seed), counts, args.requests)
+    tokens = {}
+
+    if args.target == "http":
+        transport = None
+        base_url = args.url
+    else:
+        from app.db import database
+        from app.main import app
+
+        # Lifespan events do not run under ASGITransport, so the database
+        # is installed by hand instead of through connect_to_mongo().
+        database.db = CountingDatabase(await _make_database(args))
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://benchmark"
+
+    latencies = []
+    per_endpoint = {}
+    statuses = {}
+    total_ops = 0
+    queue = iter(requests)
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60) as client:
+        async def worker():
+            nonlocal total_ops
+            for name, method, path, body, user in queue:
+                headers = {"Authorization": f"Bearer {token_for(user, tokens)}"} if user is not None else {}
+                ops = [0]
+                _current_ops.set(ops)
+                started = time.perf_counter()
+                response = await client.request(method, path, json=body, headers=headers)
+                elapsed = (time.perf_counter() - started) * 1000
+
+                latencies.append(elapsed)
+                total_ops += ops[0]
+                statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+                endpoint = per_endpoint.setdefault(name, {"requests": 0, "latencies": [], "mongo_ops": 0})
+                endpoint["requests"] += 1
+                endpoint["latencies"].append(elapsed)
+                endpoint["mongo_ops"] += ops[0]
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        duration = time.perf_counter() - started
+
+    def summarize(values):
+        values = sorted(values)
+        return {
+            "p50": round(percentile(values, 50), 3),
+            "p95": round(percentile(values, 95), 3),
+            "p99": round(percentile(values, 99), 3),
+            "max": round(values[-1], 3) if values else 0.0,
+        }
+
+    # Ops are only visible when the app runs in this process.
+    counted = args.target != "http"
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "workload": args.workload,
+        "scale": args.scale,
+        "target": args.target,
+        "seed": args.seed,
+        "requests": len(latencies),
+        "concurrency": args.concurrency,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 1),
+        "latency_ms": summarize(latencies),
+        "mongo_ops_per_request": round(total_ops / len(latencies), 2) if counted else None,
+        "status_codes": statuses,
+        "success_rate": round(sum(n for code, n in statuses.items() if code.startswith("2")) / len(latencies), 3),
+        "endpoints": {
+            name: {
+                "requests": data["requests"],
+                "latency_ms": summarize(data["latencies"]),
+                "mongo_ops_per_request": round(data["mongo_ops"] / data["requests"], 2) if counted else None,
+            }
+            for name, data in sorted(per_endpoint.items())
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", choices=WORKLOADS, default="browse-heavy")
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--target", choices=["memory", "mongo", "http"], default="memory")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="ecommerce_bench")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--no-seed", action="store_true", help="reuse data already in --db")
+    parser.add_argument("--allow-errors", action="store_true", help="write results even if the run looks invalid")
+    parser.add_argument("--output", default=None, help="defaults to benchmarks/results/<workload>-<scale>-<target>.json")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+
+    statuses = result["status_codes"]
+    auth_failures = statuses.get("401", 0) + statuses.get("403", 0)
+    if auth_failures:
+        print(f"[Benchmark Error] {auth_failures} requests were rejected by auth; check that SECRET_KEY "
+              f"matches the server's and that it was seeded with the same --scale/--seed")
+    if 1 - result["success_rate"] > MAX_ERROR_RATE:
+        print(f"[Benchmark Error] Only {result['success_rate']:.0%} of responses were 2xx: {statuses}")
+    if (auth_failures or 1 - result["success_rate"] > MAX_ERROR_RATE) and not args.allow_errors:
+        raise SystemExit("Run is not valid, results were not written (use --allow-errors to keep them)")
+
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results", f"{args.workload}-{args.scale}-{args.target}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    latency = result["latency_ms"]
+    print(
+        f"{result['workload']} @ {result['scale']} ({result['target']}): "
+        f"{result['throughput_rps']} req/s, p50 {latency['p50']}ms, p95 {latency['p95']}ms, "
+        f"p99 {latency['p99']}ms, {result['mongo_ops_per_request']} mongo ops/req"
+    )
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Throughput scaling of the multi-worker launcher.
+
+    python -m benchmarks.workers --workers 1 2 4 8 --path /
+
+Starts `app.serve` once per worker count, hammers it over HTTP from several
+client processes and prints requests/second. Needs MONGO_URL and SECRET_KEY
+in the environment just like the app itself.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+
+
+async def _client_loop(url: str, duration: float, concurrency: int) -> int:
+    done = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits) as client:
+        async def worker():
+            nonlocal done
+            while time.perf_counter() < deadline:
+                response = await client.get(url)
+                if response.status_code < 500:
+                    done += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return done
+
+
+def _client_process(url, duration, concurrency, results):
+    results.put(asyncio.run(_client_loop(url, duration, concurrency)))
+
+
+def _wait_until_ready(server: subprocess.Popen, log_path: str, base_url: str, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            with open(log_path) as log:
+                raise RuntimeError(f"Server exited with code {server.returncode}:\n{log.read()}")
+        try:
+            httpx.get(base_url + "/", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start within {timeout}s")
+
+
+def run_once(workers: int, path: str, duration: float, clients: int, concurrency: int, port: int) -> float:
+    bind = f"127.0.0.1:{port}"
+    base_url = f"http://{bind}"
+    # A pidfile of its own, so an instance already running on the host
+    # cannot stop this one from starting.
+    with tempfile.TemporaryDirectory(prefix="bench-workers-") as run_dir:
+        log_path = os.path.join(run_dir, "server.log")
+        with open(log_path, "w") as log:
+            server = subprocess.Popen(
+                [sys.executable, "-m", "app.serve", "--workers", str(workers), "--bind", bind],
+                env={**os.environ, "PIDFILE": os.path.join(run_dir, "server.pid")},
+                stdout=subprocess.DEVNULL,
+                stderr=log,
+            )
+        try:
+            _wait_until_ready(server, log_path, base_url)
+            results = multiprocessing.Queue()
+            procs = [
+                multiprocessing.Process(target=_client_process, args=(base_url + path, duration, concurrency, results))
+                for _ in range(clients)
+            ]
+            for p in procs:
+                p.start()
+            total = sum(results.get() for _ in procs)
+            for p in procs:
+                p.join()
+            return total / duration
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=os.cpu_count() or 1, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="in-flight requests per client process")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'workers':>8} {'req/s':>12} {'scaling':>8}")
+    for workers in args.workers:
+        rps = run_once(workers, args.path, args.duration, args.clients, args.concurrency, args.port)
+        baseline = baseline or rps
+        print(f"{workers:>8} {rps:>12.1f} {rps / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
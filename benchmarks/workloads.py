@@ -0,0 +1,82 @@
+"""Scripted request mixes.
+
+Each workload is a list of (weight, name, builder). A builder gets a
+random.Random and the dataset counts and returns (method, path, body, user),
+where user is the index of the user whose bearer token is sent (0 is the
+admin) or None for anonymous requests.
+"""
+from benchmarks.datagen import object_id
+
+ADMIN = 0
+
+
+def _customer(rng, counts):
+    return rng.randrange(1, counts["users"])
+
+
+def _product_detail(rng, counts):
+    product = object_id("product", rng.randrange(counts["products"]))
+    return "GET", f"/read%20by%20id/products/{product}", None, None
+
+
+def _list_products(rng, counts):
+    return "GET", "/list/products", None, None
+
+
+def _place_order(rng, counts):
+    items = [
+        {"product_id": str(object_id("product", rng.randrange(counts["products"]))), "quantity": rng.randint(1, 3)}
+        for _ in range(rng.randint(1, 3))
+    ]
+    return "POST", "/create/orders", {"items": items}, _customer(rng, counts)
+
+
+def _my_orders(rng, counts):
+    return "GET", "/all/orders", None, _customer(rng, counts)
+
+
+def _admin_dashboard(rng, counts):
+    return "GET", "/admin/dashboard", None, ADMIN
+
+
+def _admin_products_page(rng, counts):
+    limit = 50
+    pages = max(1, counts["products"] // limit)
+    return "GET", f"/admin/product?skip={rng.randrange(pages) * limit}&limit={limit}", None, ADMIN
+
+
+def _admin_order_detail(rng, counts):
+    order = object_id("order", rng.randrange(counts["orders"]))
+    return "GET", f"/admin/read-by-id/orders/{order}", None, ADMIN
+
+
+WORKLOADS = {
+    # /list/products returns every product, so it is kept rare on purpose.
+    "browse-heavy": [
+        (85, "product_detail", _product_detail),
+        (10, "my_orders", _my_orders),
+        (3, "place_order", _place_order),
+        (2, "list_products", _list_products),
+    ],
+    "checkout-heavy": [
+        (50, "place_order", _place_order),
+        (30, "product_detail", _product_detail),
+        (20, "my_orders", _my_orders),
+    ],
+    "admin-report": [
+        (10, "admin_dashboard", _admin_dashboard),
+        (50, "admin_products_page", _admin_products_page),
+        (40, "admin_order_detail", _admin_order_detail),
+    ],
+}
+
+
+def build_requests(workload: str, rng, counts: dict, total: int):
+    """Pre-generate `total` requests so the sequence is identical across runs."""
+    mix = WORKLOADS[workload]
+    weights = [weight for weight, _, _ in mix]
+    requests = []
+    for _ in range(total):
+        _, name, builder = rng.choices(mix, weights=weights)[0]
+        requests.append((name, *builder(rng, counts)))
+    return requests
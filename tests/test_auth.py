@@ -0,0 +1,124 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+from app.utils import auth
+from app.utils.auth import TokenService
+
+# Issued by python-jose 3.5 (what the app used before the token service)
+# with key "legacy-secret"; expires in 2100.
+JOSE_TOKEN = (
+    "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9"
+    ".eyJzdWIiOiJsZWdhY3lAZXhhbXBsZS5jb20iLCJyb2xlIjoiY3VzdG9tZXIiLCJleHAiOjQxMDI0NDQ4MDB9"
+    ".kz2fndiVx-h8cK7jleYYt64XM5evMTRqKkBX8tIk4yw"
+)
+
+
+def _segment(value) -> str:
+    raw = value if isinstance(value, bytes) else json.dumps(value).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _forge(header, payload, secret="test-secret") -> str:
+    signing_input = f"{_segment(header)}.{_segment(payload)}"
+    signature = hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return f"{signing_input}.{_segment(signature)}"
+
+
+def _claims(**extra):
+    return {"sub": "user@example.com", "role": "customer", "exp": int(time.time()) + 60, **extra}
+
+
+def _service():
+    return TokenService({"default": "test-secret"}, "default")
+
+
+def test_round_trip():
+    service = _service()
+    claims = _claims()
+    assert service.decode(service.encode(claims)) == claims
+
+
+def test_cached_claims_cannot_be_changed_by_callers():
+    service = _service()
+    token = service.encode(_claims())
+    service.decode(token)["role"] = "admin"
+    service.decode(token)["role"] = "admin"
+    assert service.decode(token)["role"] == "customer"
+
+
+def test_tampered_signature_is_rejected():
+    service = _service()
+    token = service.encode(_claims())
+    forged = token[:-2] + ("AA" if not token.endswith("AA") else "BB")
+    assert service.decode(forged) is None
+
+
+def test_tampered_payload_is_rejected():
+    service = _service()
+    header, _, signature = service.encode(_claims()).split(".")
+    assert service.decode(f"{header}.{_segment(_claims(role='admin'))}.{signature}") is None
+
+
+def test_other_algorithms_are_rejected():
+    service = _service()
+    for alg in ("none", "HS512", "RS256", None):
+        assert service.decode(_forge({"alg": alg, "typ": "JWT"}, _claims())) is None
+    unsigned = f"{_segment({'alg': 'none', 'typ': 'JWT'})}.{_segment(_claims())}."
+    assert service.decode(unsigned) is None
+
+
+def test_unknown_or_malformed_kid_is_rejected():
+    service = _service()
+    for kid in ("other", 123, ["default"], {"kid": "default"}, None):
+        assert service.decode(_forge({"alg": "HS256", "typ": "JWT", "kid": kid}, _claims())) is None
+
+
+def test_missing_or_expired_exp_is_rejected():
+    service = _service()
+    claims = _claims()
+    del claims["exp"]
+    assert service.decode(service.encode(claims)) is None
+    assert service.decode(service.encode(_claims(exp=int(time.time()) - 1))) is None
+    assert service.decode(service.encode(_claims(exp="4102444800"))) is None
+
+
+def test_cached_token_expires(monkeypatch):
+    service = _service()
+    token = service.encode(_claims(exp=int(time.time()) + 5))
+    assert service.decode(token) is not None
+    later = time.time() + 10
+    monkeypatch.setattr(auth.time, "time", lambda: later)
+    assert service.decode(token) is None
+
+
+def test_non_object_payload_is_rejected():
+    service = _service()
+    for payload in ([1, 2], "claims", 42, None):
+        assert service.decode(_forge({"alg": "HS256", "typ": "JWT"}, payload)) is None
+
+
+def test_malformed_tokens_are_rejected():
+    service = _service()
+    for token in ("", ".", "..", "abc", "a.b", "a.b.c", "!!!.???.***"):
+        assert service.decode(token) is None
+
+
+def test_rotated_keys_keep_verifying():
+    old = TokenService({"2025-01": "secret-a"}, "2025-01")
+    rotated = TokenService({"2025-01": "secret-a", "2025-06": "secret-b"}, "2025-06")
+    old_token = old.encode(_claims())
+    assert rotated.decode(old_token) is not None
+    assert rotated.decode(rotated.encode(_claims())) is not None
+    assert old.decode(rotated.encode(_claims())) is None
+
+
+def test_python_jose_tokens_verify():
+    service = TokenService({"default": "legacy-secret"}, "default")
+    assert service.decode(JOSE_TOKEN) == {"sub": "legacy@example.com", "role": "customer", "exp": 4102444800}
+    assert TokenService({"default": "test-secret"}, "default").decode(JOSE_TOKEN) is None